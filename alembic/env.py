@@ -2,8 +2,8 @@ import os
 from sqlalchemy import engine_from_config, pool
 from logging.config import fileConfig
 from alembic import context
-from dotenv import load_dotenv
-load_dotenv()
+from app.core.env_cache import load_env_cached
+load_env_cached()
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
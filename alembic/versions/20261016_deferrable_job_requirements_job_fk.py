@@ -0,0 +1,41 @@
+"""Make the job_requirements.job_id foreign key deferrable
+
+Revision ID: 20261016_deferrable_job_fk
+Revises: 20250921_add_more_technical
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '20261016_deferrable_job_fk'
+down_revision: Union[str, Sequence[str], None] = '20250921_add_more_technical'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _job_fk_name() -> Union[str, None]:
+    """Return the name of the job_requirements.job_id -> jobs.id foreign key, if any."""
+    inspector = sa.inspect(op.get_bind())
+    for fk in inspector.get_foreign_keys('job_requirements'):
+        if fk['referred_table'] == 'jobs' and fk['constrained_columns'] == ['job_id']:
+            return fk['name']
+    return None
+
+
+def upgrade() -> None:
+    """Make the job_id foreign key DEFERRABLE INITIALLY IMMEDIATE."""
+    # Behaviour is unchanged unless a transaction runs SET CONSTRAINTS ... DEFERRED (e.g. seed_jobs)
+    name = _job_fk_name()
+    if name:
+        op.execute(f'ALTER TABLE job_requirements ALTER CONSTRAINT "{name}" DEFERRABLE INITIALLY IMMEDIATE')
+
+
+def downgrade() -> None:
+    """Make the job_id foreign key NOT DEFERRABLE again."""
+    name = _job_fk_name()
+    if name:
+        op.execute(f'ALTER TABLE job_requirements ALTER CONSTRAINT "{name}" NOT DEFERRABLE')
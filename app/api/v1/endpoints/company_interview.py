@@ -8,7 +8,6 @@ import logging
 import os
 from datetime import datetime
 from pydantic import BaseModel, Field
-import asyncio
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +19,7 @@ from app.crud import guest_interview as guest_interview_crud
 from app.crud import guest_report as guest_report_crud
 from app.models.company import Company
 from app.models.job_offer import JobOffer
-from app.utils.openai_helper import generate_report_from_transcript
+from app.utils.openai_helper import generate_report_from_transcript, run_sync
 
 # ElevenLabs API key - in production, this should be in environment variables
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
@@ -134,7 +133,7 @@ def test_generate_report_from_conversation(
             simple_transcript.append({"role": r or "user", "message": m})
 
         # Generate report using simplified transcript
-        report = asyncio.run(generate_report_from_transcript(simple_transcript, job_title=job_title))
+        report = run_sync(generate_report_from_transcript(simple_transcript, job_title=job_title))
 
         return TestGenerateResponse(
             message="Report generated from transcript",
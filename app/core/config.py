@@ -2,10 +2,10 @@ import os
 from pydantic import EmailStr, validator
 from pydantic_settings import BaseSettings
 from typing import Any, Dict, List, Optional, Union
-from dotenv import load_dotenv
+from app.core.env_cache import load_env_cached
 
 # Load environment variables from .env file
-load_dotenv()
+load_env_cached()
 
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
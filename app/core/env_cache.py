@@ -0,0 +1,22 @@
+import os
+from functools import lru_cache
+from typing import Dict, Optional
+
+from dotenv import dotenv_values, find_dotenv
+
+
+@lru_cache(maxsize=None)
+def _env_file_values() -> Dict[str, Optional[str]]:
+    """Locate and parse the .env file (once per process)"""
+    return dotenv_values(find_dotenv())
+
+
+def load_env_cached() -> None:
+    """
+    Load the .env file into os.environ like load_dotenv(), without overriding
+    variables that are already set. The file is only read and parsed on the
+    first call; later calls reuse the parsed values.
+    """
+    for key, value in _env_file_values().items():
+        if value is not None:
+            os.environ.setdefault(key, value)
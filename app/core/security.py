@@ -3,10 +3,10 @@ from jose import jwt, JWTError
 from datetime import datetime, timedelta
 from typing import Optional
 import os
-from dotenv import load_dotenv
+from app.core.env_cache import load_env_cached
 
 # Load environment variables
-load_dotenv()
+load_env_cached()
 
 # Get SECRET_KEY from environment variables with a fallback for development
 SECRET_KEY = os.getenv("SECRET_KEY")
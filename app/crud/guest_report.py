@@ -2,9 +2,8 @@ from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from app.models.guest_report import GuestReport
 from datetime import datetime
-import asyncio
 import re
-from app.utils.openai_helper import generate_report_from_summary, generate_report_from_transcript
+from app.utils.openai_helper import generate_report_from_summary, generate_report_from_transcript, run_sync
 
 def extract_language_level_from_report(report_content: str) -> Optional[str]:
     """
@@ -130,7 +129,7 @@ def create_or_update_guest_report(
             # job_title was added in our endpoint under metadata
             job_title = metadata.get("job_title") or metadata.get("title")
 
-        openai_report = asyncio.run(generate_report_from_transcript(transcript, job_title=job_title))
+        openai_report = run_sync(generate_report_from_transcript(transcript, job_title=job_title))
         
         # Extract data from OpenAI response
         report_content = openai_report.get("report_content", "")
@@ -0,0 +1,51 @@
+import os
+import threading
+from typing import Dict
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+# Pool size of each engine (e.g. 1 in tests/CI that only need a single connection)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = 20
+# Rows per multi-row INSERT ... VALUES statement when executing many parameter sets
+DB_INSERT_PAGE_SIZE = 1000
+
+# One engine (and connection pool) per database URL, shared by every caller in the process
+_engines: Dict[str, Engine] = {}
+_lock = threading.Lock()
+
+
+def get_engine(url: str) -> Engine:
+    """
+    Return the engine for a database URL, creating it on first use
+
+    Args:
+        url: SQLAlchemy database URL
+
+    Returns:
+        The shared engine for that URL
+    """
+    engine = _engines.get(url)
+    if engine is not None:
+        return engine
+    with _lock:
+        engine = _engines.get(url)
+        if engine is None:
+            kwargs = {}
+            if make_url(url).get_driver_name() == "psycopg2":
+                # Batch executemany UPDATE/DELETE too (INSERTs already use multi-row VALUES)
+                kwargs["executemany_mode"] = "values_plus_batch"
+            engine = create_engine(
+                url,
+                poolclass=QueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_pre_ping=True,  # Verify connections before using them
+                pool_recycle=3600,   # Recycle connections after 1 hour
+                insertmanyvalues_page_size=DB_INSERT_PAGE_SIZE,
+                **kwargs
+            )
+            _engines[url] = engine
+        return engine
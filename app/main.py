@@ -1,3 +1,8 @@
+from app.core.env_cache import load_env_cached
+
+# Load the .env file once, before any app module reads its configuration
+load_env_cached()
+
 from fastapi import FastAPI, Request, HTTPException, Depends
 from app.api import auth
 from app.api.v1.endpoints import candidates, jobs, interviews, reports, company, invitations, applications
@@ -5,10 +10,12 @@ from app.api.v1.endpoints import company_interview
 from app.api.v1 import company_auth, job_offers
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import logging
 from starlette.middleware.base import BaseHTTPMiddleware
 from app.db.session import get_db
 from sqlalchemy.orm import Session
+from app.utils import openai_helper
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -538,4 +545,12 @@ app.include_router(applications.router, prefix="/api/applications", tags=["appli
 @app.on_event("startup")
 async def startup_event():
     logger.info("FastAPI application starting with CORS enabled")
-    logger.info("CORS headers will be added to all responses")
\ No newline at end of file
+    logger.info("CORS headers will be added to all responses")
+    # Load the tiktoken encodings in a worker thread (the first load downloads them)
+    # so that the first CV or transcript request does not wait for it
+    asyncio.get_running_loop().run_in_executor(None, openai_helper.preload_encodings)
+
+# Close the pooled OpenAI HTTP client on shutdown
+@app.on_event("shutdown")
+async def shutdown_event():
+    await openai_helper.close_http_client()
\ No newline at end of file
@@ -11,5 +11,5 @@ class JobRequirement(Base):
     job_offer = relationship("JobOffer", back_populates="requirements")
     
     # Add relationship to Job model
-    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE", deferrable=True, initially="IMMEDIATE"), nullable=True)
     job = relationship("Job", back_populates="requirements")
\ No newline at end of file
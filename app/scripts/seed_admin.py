@@ -0,0 +1,88 @@
+import os
+import argparse
+from functools import lru_cache
+from app.core.env_cache import load_env_cached
+load_env_cached()
+
+from sqlalchemy.orm import Session
+from app.db.engine_cache import get_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+# Import all models to ensure they are registered with SQLAlchemy
+from app.models.user import User
+from app.models.interview import Interview
+from app.models.job import Job
+from app.models.job_requirement import JobRequirement
+from app.models.report import Report
+from app.core.security import get_password_hash
+
+@lru_cache(maxsize=32)
+def _cached_password_hash(password):
+    # bcrypt is deliberately slow; hash each distinct password at most once per process
+    return get_password_hash(password)
+
+# Hostname of the database service inside docker-compose
+DOCKER_DB_HOST = "db"
+
+def seed_admin(host_override=None):
+    # Get database connection parameters from environment variables
+    user = os.getenv("POSTGRES_USER")
+    password = os.getenv("POSTGRES_PASSWORD")
+    # An explicit host (CLI flag) wins over the environment
+    host = host_override or os.getenv("POSTGRES_HOST")
+    port = os.getenv("POSTGRES_PORT")
+    db = os.getenv("POSTGRES_DB")
+    
+    # Create a direct database URL for local connection
+    database_url = f"postgresql://{user}:{password}@{host}:{port}/{db}"
+    print(f"Connecting to: {database_url}")
+    
+    # Create a new session
+    engine = get_engine(database_url)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db_session = SessionLocal()
+    
+    admin_email = os.getenv("ADMIN_EMAIL", "admin@example.com")
+    admin_password = os.getenv("ADMIN_PASSWORD", "admin123")
+    # Optional precomputed bcrypt hash of the admin password, which skips hashing entirely.
+    # Generate it once with:
+    #   python -c "from app.core.security import get_password_hash; print(get_password_hash('<password>'))"
+    admin_password_hash = os.getenv("ADMIN_PASSWORD_HASH") or _cached_password_hash(admin_password)
+    admin_name = os.getenv("ADMIN_NAME", "Admin")
+    admin_role = "admin"
+    
+    try:
+        # Single idempotent statement: nothing is inserted if the email is already taken
+        stmt = (
+            pg_insert(User.__table__)
+            .values(
+                email=admin_email,
+                hashed_password=admin_password_hash,
+                full_name=admin_name,
+                role=admin_role,
+                is_active=1,
+            )
+            .on_conflict_do_nothing(index_elements=["email"])
+            .returning(User.__table__.c.id)
+        )
+        # The only statement of the script, so it opens the single connection it needs
+        created_id = db_session.execute(stmt).scalar()
+        db_session.commit()
+        if created_id is None:
+            print(f"Admin user with email {admin_email} already exists.")
+            return
+        print(f"Admin user {admin_email} created successfully.")
+    finally:
+        db_session.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Create the admin user if it does not exist')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--host', help='Database host (overrides POSTGRES_HOST)')
+    group.add_argument('--use-docker-host', action='store_true', help=f'Connect to the docker-compose database host ("{DOCKER_DB_HOST}")')
+    args = parser.parse_args(argv)
+    
+    seed_admin(host_override=DOCKER_DB_HOST if args.use_docker_host else args.host)
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,68 @@
 import os
-import json
+import logging
+import asyncio
+import hashlib
+import multiprocessing
+import operator
+import threading
+import time
 import httpx
-import PyPDF2
-import docx
+import orjson
+import diskcache
 import io
-from typing import Dict, Any, List, Optional
-import dotenv
+import zipfile
+import textwrap
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter, wait_random
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, Union
 
-dotenv.load_dotenv()
+# CV parsers and the tokenizer are imported on first use, so workers that never
+# handle a CV (or never truncate one) don't pay for loading them
+if TYPE_CHECKING:
+    import tiktoken
+
+logger = logging.getLogger(__name__)
 
 # OpenAI API configuration
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_EMBEDDING_URL = "https://api.openai.com/v1/embeddings"
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+# Model used for interview reports (gpt-4o-mini is much faster/cheaper than gpt-4o)
+OPENAI_REPORT_MODEL = os.getenv("OPENAI_REPORT_MODEL", "gpt-4o-mini")
+# Maximum number of in-flight OpenAI requests per event loop
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "50"))
+# Connection pool bounds of the shared OpenAI client; keeping as many idle connections
+# as there can be in-flight requests avoids reconnecting after every burst
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", str(OPENAI_MAX_CONCURRENCY)))
+# Transient OpenAI failures (network errors, 429 and 5xx) are retried up to this many attempts
+OPENAI_MAX_ATTEMPTS = 5
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
 
-async def extract_text_from_cv(file_path: str) -> str:
-    """
-    Extract text from a CV file (PDF or DOCX)
-    
-    Args:
-        file_path: Path to the CV file
-        
-    Returns:
-        Extracted text from the CV
-    """
-    try:
-        # Check file extension
-        file_extension = file_path.split('.')[-1].lower()
-        
-        if file_extension == 'pdf':
-            # Extract text from PDF
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ''
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + '\n'
-                return text
-                
-        elif file_extension == 'docx':
-            # Extract text from DOCX
-            doc = docx.Document(file_path)
-            text = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-            return text
-            
-        else:
-            return f"Unsupported file format: {file_extension}"
-            
-    except Exception as e:
-        print(f"Error extracting text from CV: {str(e)}")
-        return f"Error extracting text: {str(e)}"
+# CVs longer than CV_HEAD_TOKENS + CV_TAIL_TOKENS tokens are cut down to their first
+# CV_HEAD_TOKENS and last CV_TAIL_TOKENS tokens before being sent to OpenAI
+CV_HEAD_TOKENS = 6000
+CV_TAIL_TOKENS = 2000
 
+# Transcripts longer than TRANSCRIPT_MAX_TOKENS tokens keep only their opening and
+# closing turns (introduction, salary, availability, wrap-up) before being sent
+TRANSCRIPT_MAX_TOKENS = 6000
+
+# Output budget of transcript-based reports: a floor plus one token per
+# TRANSCRIPT_REPORT_TOKENS_RATIO tokens of (kept) transcript, capped. A report cut
+# by the budget is requested again once with TRANSCRIPT_REPORT_MAX_TOKENS.
+TRANSCRIPT_REPORT_MIN_TOKENS = 1500
+TRANSCRIPT_REPORT_TOKENS_RATIO = 3
+TRANSCRIPT_REPORT_MAX_TOKENS = 4000
+
+# Static instructions are kept in the system message, byte-for-byte identical
+# across calls, so OpenAI's automatic prompt-prefix cache can reuse them; only
+# the CV text / interview summary goes into the user message.
+SUMMARY_SYSTEM_PROMPT = textwrap.dedent("""
+    Vous êtes un expert en ressources humaines chargé d'évaluer des CV de candidats. Votre mission est de fournir une analyse objective et constructive du profil présenté selon le format demandé.
 
-async def generate_candidate_summary(cv_text: str) -> str:
-    """
-    Generate a structured analysis report of the candidate from their CV text using OpenAI GPT-4o mini
-   
-    Args:
-        cv_text: Extracted text from the candidate's CV
-       
-    Returns:
-        A structured analysis report following the specified format
-    """
-    if not OPENAI_API_KEY:
-        raise ValueError("OpenAI API key is not configured")
-   
-    # Prepare the prompt for OpenAI
-    prompt = f"""
     Analysez le CV fourni et générez un rapport structuré selon le format suivant :
 
     **RAPPORT D'ANALYSE DE CV**
@@ -108,69 +106,11 @@ async def generate_candidate_summary(cv_text: str) -> str:
     - Évitez les suppositions non fondées
     - Utilisez un ton professionnel et bienveillant
     - Utilisez la date d'aujourd'hui pour "Date d'analyse"
+""").strip()
 
-    CV Content:
-    {cv_text}
-    """
-   
-    # Prepare the request to OpenAI
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {OPENAI_API_KEY}"
-    }
-   
-    payload = {
-        "model": "gpt-4o-mini",
-        "messages": [
-            {"role": "system", "content": "Vous êtes un expert en ressources humaines chargé d'évaluer des CV de candidats. Votre mission est de fournir une analyse objective et constructive du profil présenté selon le format demandé."},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.3,  # Lower temperature for more consistent outputs
-        "max_tokens": 1500   # Increased for the detailed structured report
-    }
-   
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                OPENAI_API_URL,
-                headers=headers,
-                json=payload,
-                timeout=30.0
-            )
-           
-            if response.status_code != 200:
-                raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
-           
-            result = response.json()
-            content = result["choices"][0]["message"]["content"]
-           
-            return content.strip()
-               
-    except Exception as e:
-        print(f"Error generating candidate analysis with OpenAI: {str(e)}")
-        # Return a default response in case of error
-        return "Unable to generate candidate analysis due to processing error."
-
+REPORT_SYSTEM_PROMPT = textwrap.dedent("""
+    You are an expert HR assistant that evaluates interview transcripts.
 
-async def generate_report_from_summary(summary: str) -> Dict[str, Any]:
-    """
-    Generate a detailed report from an interview summary using OpenAI.
-    
-    Args:
-        summary: The summary of the interview conversation
-        
-    Returns:
-        A dictionary containing the generated report fields:
-        - strengths: List of candidate strengths
-        - weaknesses: List of areas for improvement
-        - recommendation: Overall recommendation
-        - score: Numerical score (0-100)
-    """
-    if not OPENAI_API_KEY:
-        raise ValueError("OpenAI API key is not configured")
-    
-    # Prepare the prompt for OpenAI
-    prompt = f"""
     Vous êtes un consultant RH expérimenté chargé de rédiger un rapport d'évaluation professionnel basé sur une transcription d'entretien. Analysez la transcription fournie et produisez un rapport structuré suivant ce format exact :
 
     ## Structure du Rapport
@@ -254,145 +194,20 @@ async def generate_report_from_summary(summary: str) -> Dict[str, Any]:
     - **Utilisez le gras** pour les éléments clés
     - **Puces et sous-puces** pour la lisibilité
 
-    Transcription d'entretien à analyser :
-    {summary}
-
     Générez maintenant le rapport d'évaluation correspondant en format JSON avec cette structure :
-    {{
+    {
         "report_content": "Le rapport complet formaté en markdown selon la structure ci-dessus",
         "score": 4.2,
         "recommendation": "Synthèse de la recommandation finale"
-    }}
-
-    Le score doit être sur 5 avec une décimale (ex: 4.2/5).
-    """
-    
-    # Prepare the request to OpenAI
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {OPENAI_API_KEY}"
-    }
-    
-    payload = {
-        "model": "gpt-4o",  # Using GPT-4o for best results
-        "messages": [
-            {"role": "system", "content": "You are an expert HR assistant that evaluates interview transcripts."},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.5,  # Lower temperature for more consistent outputs
-        "max_tokens": 1000
     }
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                OPENAI_API_URL,
-                headers=headers,
-                json=payload,
-                timeout=30.0
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
-            
-            result = response.json()
-            content = result["choices"][0]["message"]["content"]
-            
-            print(f"OpenAI raw response content: {content}")
-            
-            # Strip markdown code blocks if present
-            if content.startswith('```json'):
-                content = content.replace('```json', '').replace('```', '').strip()
-                print(f"Stripped markdown, cleaned content: {content}")
-            
-            # Parse the JSON response
-            try:
-                report_data = json.loads(content)
-                
-                # Validate the structure for new format
-                if not all(k in report_data for k in ["report_content", "recommendation", "score"]):
-                    raise ValueError("Missing required fields in the generated report")
-                
-                # Ensure score is within range (0-5 scale now)
-                report_data["score"] = max(0, min(5, report_data["score"]))
-                
-                # Convert to the expected format for database storage
-                # We'll store the full report content as a single field
-                formatted_report = {
-                    "report_content": report_data["report_content"],
-                    "recommendation": report_data["recommendation"],
-                    "score": int(report_data["score"] * 20),  # Convert 5-scale to 100-scale for compatibility
-                    "strengths": ["Voir rapport complet"],  # Placeholder for backward compatibility
-                    "weaknesses": ["Voir rapport complet"]   # Placeholder for backward compatibility
-                }
-                
-                return formatted_report
-                
-            except json.JSONDecodeError as e:
-                # If JSON parsing fails, log the error and content
-                print(f"JSON parsing failed: {str(e)}")
-                print(f"Failed to parse content: {content}")
-                return {
-                    "report_content": "# Rapport d'évaluation\n\nErreur lors de l'analyse automatique de la transcription. Veuillez analyser manuellement.",
-                    "recommendation": "Analyse manuelle requise en raison d'une erreur de traitement",
-                    "score": 65,
-                    "strengths": ["Voir rapport complet"],
-                    "weaknesses": ["Voir rapport complet"]
-                }
-    
-    except Exception as e:
-        print(f"Error generating report with OpenAI: {str(e)}")
-        # Return a default response in case of error
-        return {
-            "report_content": "# Rapport d'évaluation\n\n**Erreur de traitement**\n\nImpossible de générer le rapport automatiquement. Une analyse manuelle est requise.",
-            "recommendation": "Erreur de traitement - analyse manuelle requise",
-            "score": 50,
-            "strengths": ["Voir rapport complet"],
-            "weaknesses": ["Voir rapport complet"]
-        }
-
-
-async def generate_report_from_transcript(transcript: List[Dict[str, Any]], job_title: Optional[str] = None) -> Dict[str, Any]:
-    """
-    Generate a detailed report using the full interview transcript (role + message) rather than a summary.
-
-    Args:
-        transcript: List of turns with fields including 'role' and 'message'.
-        job_title: Optional job title context to include in the prompt.
-
-    Returns:
-        A dict with only: report_content
-    """
-    if not OPENAI_API_KEY:
-        raise ValueError("OpenAI API key is not configured")
-
-    # Build a readable transcript text
-    turns: List[str] = []
-    for turn in transcript or []:
-        # Accept multiple possible keys from different providers
-        role_raw = turn.get("role", turn.get("speaker", ""))
-        role = str(role_raw).strip()
-        # Prefer 'message', but gracefully fall back to other common fields
-        msg_raw = (
-            turn.get("message")
-            if turn.get("message") is not None else
-            turn.get("text")
-            if turn.get("text") is not None else
-            turn.get("content")
-            if turn.get("content") is not None else
-            turn.get("value")
-        )
-        msg = str(msg_raw or "").strip()
-        if not msg:
-            continue
-        # Normalize role to fr labels
-        role_label = "Agent" if role.lower() == "agent" else ("Candidat" if role.lower() == "user" else role.capitalize())
-        turns.append(f"- {role_label}: {msg}")
-    transcript_block = "\n".join(turns)
 
-    job_title_line = f"Poste visé: {job_title}\n" if job_title else ""
+    Le score doit être sur 5 avec une décimale (ex: 4.2/5).
+""").strip()
 
-    prompt = f"""Vous êtes un assistant RH expert. À partir de la transcription complète de l'entretien ci-dessous, générez un rapport d'évaluation en français au FORMAT MARKDOWN (titres, sous-titres, listes à puces). Conservez l'ordre des sections et des informations.
+# Instructions of the transcript-based report. Kept as a constant so every request
+# starts with the same byte-identical prefix (OpenAI prompt caching); the job title
+# and the transcript are appended after it.
+TRANSCRIPT_PROMPT_PREFIX = """Vous êtes un assistant RH expert. À partir de la transcription complète de l'entretien ci-dessous, générez un rapport d'évaluation en français au FORMAT MARKDOWN (titres, sous-titres, listes à puces). Conservez l'ordre des sections et des informations.
 
 RÈGLES IMPORTANTES:
 - Remplacez TOUS les éléments entre crochets par des valeurs concrètes déduites de la conversation.
@@ -447,97 +262,1227 @@ RÈGLES IMPORTANTES:
   - report_content: le rapport en Markdown EXACTEMENT au format ci-dessus (sans autre champ)
 
 Contexte (à utiliser pour remplir le rapport):
-{job_title_line}Transcription complète de l'entretien:
-{transcript_block}
 """
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {OPENAI_API_KEY}"
+# User message templates, filled with a single str.format call per request.
+# The transcript template keeps the static instructions as a stable prefix.
+SUMMARY_USER_PROMPT = "CV Content:\n{cv_text}"
+REPORT_USER_PROMPT = "Transcription d'entretien à analyser :\n{summary}"
+TRANSCRIPT_PROMPT = TRANSCRIPT_PROMPT_PREFIX + "{job_title_line}Transcription complète de l'entretien:\n{transcript_block}\n"
+
+# Transcript turns: role labels and message fields (in priority order) across providers
+_ROLE_MAP = {"agent": "Agent", "user": "Candidat"}
+_MSG_KEYS = ("message", "text", "content", "value")
+
+# JSON schema enforced by OpenAI structured outputs for generate_report_from_summary
+REPORT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "interview_report",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "report_content": {"type": "string"},
+                "score": {"type": "number"},
+                "recommendation": {"type": "string"}
+            },
+            "required": ["report_content", "score", "recommendation"],
+            "additionalProperties": False
+        }
     }
+}
 
-    payload = {
-        "model": "gpt-4o",
-        "messages": [
-            {"role": "system", "content": "Vous êtes un assistant RH expert et strict. Vous suivez exactement les instructions et renvoyez UNIQUEMENT le format demandé."},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.2,
-        "max_tokens": 4000,
+# JSON schema enforced by OpenAI structured outputs for generate_report_from_transcript
+TRANSCRIPT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "interview_transcript_report",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "report_content": {"type": "string"}
+            },
+            "required": ["report_content"],
+            "additionalProperties": False
+        }
     }
+}
+
+# Shared OpenAI HTTP clients, one per event loop (see _get_client). Entries are
+# removed by close_http_client() and pruned once their loop is closed.
+_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+# Semaphores bounding concurrent OpenAI requests, one per event loop (see _get_semaphore)
+_semaphores: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Static parts of the OpenAI requests, built once; each call only appends its user message
+_SUMMARY_PAYLOAD_BASE = {
+    "model": "gpt-4o-mini",
+    "messages": [{"role": "system", "content": SUMMARY_SYSTEM_PROMPT}],
+    "temperature": 0.3,  # Lower temperature for more consistent outputs
+    "max_tokens": 1500   # Increased for the detailed structured report
+}
+
+_REPORT_PAYLOAD_BASE = {
+    "model": OPENAI_REPORT_MODEL,
+    "messages": [{"role": "system", "content": REPORT_SYSTEM_PROMPT}],
+    "temperature": 0.5,  # Lower temperature for more consistent outputs
+    "max_tokens": 1000,
+    "response_format": REPORT_RESPONSE_FORMAT
+}
+
+_TRANSCRIPT_PAYLOAD_BASE = {
+    "model": "gpt-4o",
+    "messages": [{"role": "system", "content": "Vous êtes un assistant RH expert et strict. Vous suivez exactement les instructions et renvoyez UNIQUEMENT le format demandé."}],
+    "temperature": 0.2,
+    "max_tokens": TRANSCRIPT_REPORT_MAX_TOKENS,
+    "response_format": TRANSCRIPT_RESPONSE_FORMAT
+}
+
+# Worker processes used to extract PDF pages in parallel (PDF parsing is CPU-bound).
+# Slightly oversubscribed so workers waiting on file I/O don't leave cores idle.
+PDF_WORKERS = max(1, int((os.cpu_count() or 1) * 1.5))
+# Workers are spawned, not forked, so they never inherit a held _PDFIUM_LOCK or PDFium state.
+_PROC_POOL = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+# PDFs with fewer pages are extracted in a single thread: the process round-trip would cost more
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+# Extracted PDF page texts are kept on disk by (file hash, page index), so re-analyzing
+# the same CV skips parsing entirely; an empty PDF_CACHE_DIR disables it
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "./cache/pdf")
+PDF_CACHE_TTL = 30 * 86400  # 30 days
+# PDFium is not thread-safe: serialize its use within a process
+_PDFIUM_LOCK = threading.Lock()
+
+# DOCX text is read straight from word/document.xml: every paragraph (body, tables
+# and text boxes, skipping the mc:Fallback copies of text boxes), with its runs
+# rendered like python-docx's Run.text (tabs as "\t", line breaks as "\n")
+_DOCX_NS = {
+    "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "mc": "http://schemas.openxmlformats.org/markup-compatibility/2006"
+}
+_DOCX_W = "{%s}" % _DOCX_NS["w"]
+
+# Results of OpenAI calls are cached in-process (LRU) and, when OPENAI_CACHE_DIR is
+# set (the default), on disk so they survive restarts. Keys combine the content hash,
+# the model and PROMPT_VERSION: bump PROMPT_VERSION whenever a prompt changes.
+PROMPT_VERSION = "1"
+OPENAI_CACHE_DIR = os.getenv("OPENAI_CACHE_DIR", "./cache/openai")
+OPENAI_CACHE_TTL = 30 * 86400  # 30 days
+
+# In-process LRU cache of candidate summaries
+SUMMARY_CACHE_SIZE = 1024
+_summary_cache: "OrderedDict[str, str]" = OrderedDict()
+
+# In-process LRU cache of formatted summary-based reports
+REPORT_CACHE_SIZE = 1024
+_report_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
 
+# In-process LRU cache of transcript-based reports
+TRANSCRIPT_REPORT_CACHE_SIZE = 1024
+_transcript_report_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+# Optional semantic cache of transcript-based reports: a transcript whose embedding is at
+# least this cosine-similar to a previous one for the same job title reuses its report.
+# Disabled unless set (e.g. 0.95), since the reused report was written for another interview.
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("OPENAI_SEMANTIC_CACHE_THRESHOLD", "0"))
+SEMANTIC_CACHE_SIZE = 256  # reports kept per job title
+# In-memory copy of the entries of each job title, loaded from disk once. On disk, each
+# entry has its own key (a ring of SEMANTIC_CACHE_SIZE slots) next to an append counter,
+# so storing a report writes one entry instead of the whole list.
+_semantic_index: Dict[str, List[Tuple[List[float], Dict[str, Any]]]] = {}
+_semantic_counts: Dict[str, int] = {}
+_semantic_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _disk_cache() -> Optional[diskcache.Cache]:
+    """Return the persistent cache, or None if disabled or unavailable"""
+    if not OPENAI_CACHE_DIR:
+        return None
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                OPENAI_API_URL,
-                headers=headers,
-                json=payload,
-                timeout=45.0
-            )
+        return diskcache.Cache(OPENAI_CACHE_DIR)
+    except Exception as e:
+        logger.warning("OpenAI disk cache disabled (%s): %s", OPENAI_CACHE_DIR, e)
+        return None
+
+
+def _cache_key(namespace: str, content: str, model: str) -> str:
+    """Build a cache key from the hash of the request content, the model and the prompt version"""
+    digest = hashlib.sha256(content.encode()).hexdigest()
+    return f"{namespace}:{digest}:{model}:{PROMPT_VERSION}"
+
+
+def _disk_get(key: str) -> Any:
+    """Read key from the disk cache (blocking), or None if missing, disabled or unreadable"""
+    disk = _disk_cache()
+    if disk is None:
+        return None
+    try:
+        return disk.get(key)
+    except Exception as e:
+        logger.warning("OpenAI disk cache read failed: %s", e)
+        return None
+
+
+def _disk_set(key: str, value: Any) -> None:
+    """Write key to the disk cache (blocking), if enabled"""
+    disk = _disk_cache()
+    if disk is None:
+        return
+    try:
+        disk.set(key, value, expire=OPENAI_CACHE_TTL)
+    except Exception as e:
+        logger.warning("OpenAI disk cache write failed: %s", e)
+
 
-            if response.status_code != 200:
-                raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+async def _cache_get(cache: OrderedDict, key: str, max_size: int) -> Any:
+    """
+    Return the cached value for key (or None) and mark it as recently used,
+    falling back to the disk cache (read in a thread) on an in-process miss
+    """
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+        return value
+
+    if not OPENAI_CACHE_DIR:
+        return None
+    # Opening the cache and SQLite reads block: keep them off the event loop
+    value = await asyncio.to_thread(_disk_get, key)
+    if value is not None:
+        cache[key] = value
+        if len(cache) > max_size:
+            cache.popitem(last=False)
+    return value
+
+
+async def _cache_set(cache: OrderedDict, key: str, value: Any, max_size: int) -> None:
+    """Store value under key (and on disk, from a thread), evicting the least recently used entry when full"""
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > max_size:
+        cache.popitem(last=False)
+
+    if OPENAI_CACHE_DIR:
+        # SQLite writes (and their fsync) block: keep them off the event loop
+        await asyncio.to_thread(_disk_set, key, value)
+
+
+def _semantic_entries(key: str) -> List[Tuple[List[float], Dict[str, Any]]]:
+    """
+    Return the (embedding, report) entries stored under key, oldest first, loading
+    them from disk once (blocking; call with _semantic_lock held)
+    """
+    entries = _semantic_index.get(key)
+    if entries is None:
+        count = _disk_get(key)
+        if not isinstance(count, int):
+            count = 0
+        entries = []
+        for position in range(max(0, count - SEMANTIC_CACHE_SIZE), count):
+            entry = _disk_get(f"{key}:{position % SEMANTIC_CACHE_SIZE}")
+            if entry is not None:
+                entries.append(entry)
+        _semantic_index[key] = entries
+        _semantic_counts[key] = count
+    return entries
+
+
+def _semantic_cache_key(job_title: Optional[str]) -> str:
+    """Build the semantic cache key of a job title"""
+    return f"semantic:{job_title or ''}:{_TRANSCRIPT_PAYLOAD_BASE['model']}:{PROMPT_VERSION}"
+
+
+def _semantic_cache_get(job_title: Optional[str], embedding: List[float]) -> Optional[Dict[str, Any]]:
+    """
+    Return the cached report most similar to embedding, if above SEMANTIC_CACHE_THRESHOLD
+    (blocking scan: run it with asyncio.to_thread)
+    """
+    with _semantic_lock:
+        entries = list(_semantic_entries(_semantic_cache_key(job_title)))
+    best, best_score = None, SEMANTIC_CACHE_THRESHOLD
+    for vector, report in entries:
+        # OpenAI embeddings are unit-length, so the dot product is the cosine similarity
+        score = sum(map(operator.mul, vector, embedding))
+        if score >= best_score:
+            best, best_score = report, score
+    return best
 
-            result = response.json()
-            choices = result.get("choices", [])
-            content = choices[0].get("message", {}).get("content", "{}")
-            # Debug log (truncated)
-            print(f"OpenAI raw content (first 200): {str(content)[:200]}")
 
-        # Some models wrap JSON in code fences; strip if present
-        cleaned = content.strip()
-        if cleaned.startswith("```json"):
-            cleaned = cleaned.removeprefix("```json").removeprefix("```").strip()
-        elif cleaned.startswith("```"):
-            cleaned = cleaned.removeprefix("```").strip()
+def _semantic_cache_set(job_title: Optional[str], embedding: List[float], report: Dict[str, Any]) -> None:
+    """
+    Store a report under its transcript embedding, keeping the SEMANTIC_CACHE_SIZE most
+    recent (blocking disk write: run it with asyncio.to_thread)
+    """
+    key = _semantic_cache_key(job_title)
+    with _semantic_lock:
+        entries = _semantic_entries(key)
+        entries.append((embedding, report))
+        del entries[:-SEMANTIC_CACHE_SIZE]
+        count = _semantic_counts[key]
+        _semantic_counts[key] = count + 1
+        _disk_set(f"{key}:{count % SEMANTIC_CACHE_SIZE}", (embedding, report))
+        _disk_set(key, count + 1)
+
+
+@lru_cache(maxsize=None)
+def _pdf_cache() -> Optional[diskcache.Cache]:
+    """Return the persistent PDF page cache, or None if disabled or unavailable"""
+    if not PDF_CACHE_DIR:
+        return None
+    try:
+        return diskcache.Cache(PDF_CACHE_DIR)
+    except Exception as e:
+        logger.warning("PDF page cache disabled (%s): %s", PDF_CACHE_DIR, e)
+        return None
+
+
+def _read_pdf_page_cache(file_path: str) -> Tuple[str, List[Optional[str]]]:
+    """
+    Hash a PDF and look up its pages in the page cache
+
+    Args:
+        file_path: Path to the PDF file
+
+    Returns:
+        (file digest, cached text of each page or None when missing)
+    """
+    with open(file_path, 'rb') as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
 
+    cache = _pdf_cache()
+    if cache is not None:
         try:
-            data = json.loads(cleaned)
-            # Validate required field
-            if not isinstance(data, dict) or "report_content" not in data:
-                raise ValueError("Invalid response format: 'report_content' missing")
-            report_content = str(data.get("report_content", "")).strip()
-            return {"report_content": report_content}
-        except Exception as parse_err:
-            # If it's not valid JSON, accept raw content as the report text if it looks like a report
-            if isinstance(cleaned, str) and ("Rapport" in cleaned or "Candidat" in cleaned or "Score global" in cleaned):
-                print(f"Non-JSON content accepted as report (first 200): {cleaned[:200]}")
-                return {"report_content": cleaned}
-            # Otherwise, propagate to generic fallback
-            print(f"JSON parse error: {str(parse_err)}; content sample: {cleaned[:200]}")
-            raise
+            page_count = cache.get(f"{digest}:pages")
+            if page_count is not None:
+                return digest, [cache.get(f"{digest}:{i}") for i in range(page_count)]
+        except Exception as e:
+            logger.warning("PDF page cache read failed: %s", e)
+    return digest, [None] * _count_pdf_pages(file_path)
+
+
+def _write_pdf_page_cache(digest: str, page_count: int, texts: Dict[int, str]) -> None:
+    """Store freshly extracted page texts (by page index) in the page cache"""
+    cache = _pdf_cache()
+    if cache is None:
+        return
+    try:
+        for i, text in texts.items():
+            cache.set(f"{digest}:{i}", text, expire=PDF_CACHE_TTL)
+        # Written last, so a document only looks cached once all its pages are
+        cache.set(f"{digest}:pages", page_count, expire=PDF_CACHE_TTL)
     except Exception as e:
-        print(f"Error generating transcript-based report with OpenAI: {str(e)}")
-        # Helpful debug of provided context sizes
+        logger.warning("PDF page cache write failed: %s", e)
+
+
+def _extract_pdf_pages(file_path: str, page_indices: List[int]) -> List[str]:
+    """
+    Extract the text of the given PDF pages. Runs in a worker process for
+    large documents, in a thread otherwise.
+
+    Args:
+        file_path: Path to the PDF file
+        page_indices: Indices of the pages to extract
+
+    Returns:
+        The text of each page, each followed by a line break
+    """
+    import pypdfium2 as pdfium
+
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(file_path)
         try:
-            print(f"Transcript length (chars): {len(transcript_block)}; turns: {len(turns)}")
-        except Exception:
-            pass
-        return {
-            "report_content": (
-                "# Rapport d’évaluation\n\n"
-                "- Candidat : Non mentionné\n"
-                "- Poste visé : Non mentionné\n"
-                "- Date de l’entretien : \n"
-                "- Expérience totale : Non mentionnée\n"
-                "- Niveau de langue : Intermediate\n"
-                "- Score global : 0.0/5\n"
-                "- Statut du rapport : Présélection réalisée\n\n"
-                "## Présélection\n\n"
-                "### Vérifications effectuées\n"
-                "- Non mentionnées\n\n"
-                "### Disponibilité\n"
-                "- Non mentionnée\n\n"
-                "### Prétention salariale\n"
-                "- Non mentionnée\n\n"
-                "### Autres réponses aux questions du recruteur\n"
-                "- Non mentionnées\n\n"
-                "## Évaluation\n\n"
-                "### Points forts\n"
-                "- Non mentionnés\n\n"
-                "### Points faibles\n"
-                "- Non mentionnés\n\n"
-                "## Recommandation\n"
-                "- Non mentionnée\n"
-            )
-        }
+            texts = []
+            for i in page_indices:
+                page = pdf[i]
+                textpage = page.get_textpage()
+                # PDFium separates lines with CRLF
+                texts.append(textpage.get_text_range().replace('\r\n', '\n') + '\n')
+                textpage.close()
+                page.close()
+            return texts
+        finally:
+            pdf.close()
+
+
+def _prune_closed_loops(per_loop: Dict[asyncio.AbstractEventLoop, Any]) -> None:
+    """Drop the entries of a per-loop registry whose event loop has been closed"""
+    for loop in [loop for loop in per_loop if loop.is_closed()]:
+        del per_loop[loop]
+
+
+def _get_client() -> httpx.AsyncClient:
+    """
+    Return the pooled HTTP/2 client shared by all OpenAI calls made from the
+    running event loop. Clients are kept per loop because some callers run
+    these helpers from synchronous code (see run_sync), and connections cannot
+    be shared across event loops.
+    """
+    loop = asyncio.get_running_loop()
+    _prune_closed_loops(_clients)
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=45.0
+        )
+        _clients[loop] = client
+    return client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Return the semaphore limiting in-flight OpenAI requests on the running event loop"""
+    loop = asyncio.get_running_loop()
+    _prune_closed_loops(_semaphores)
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client of the running event loop (app shutdown hook)"""
+    loop = asyncio.get_running_loop()
+    _semaphores.pop(loop, None)
+    client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Run an OpenAI helper coroutine from synchronous code, like asyncio.run(),
+    closing the HTTP client of its temporary event loop before returning
+
+    Args:
+        coro: Coroutine to run (e.g. generate_report_from_transcript(...))
+
+    Returns:
+        The coroutine's result
+    """
+    async def _run() -> T:
+        try:
+            return await coro
+        finally:
+            await close_http_client()
+
+    return asyncio.run(_run())
+
+
+def _api_key() -> str:
+    """Read the OpenAI API key at call time (the environment is loaded by the app entrypoint)"""
+    return os.getenv("OPENAI_API_KEY", "")
+
+
+@lru_cache(maxsize=4)
+def _headers_for(api_key: str) -> Dict[str, str]:
+    """Build (once per key) the headers sent with every OpenAI request"""
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+
+
+def _openai_headers() -> Dict[str, str]:
+    """Return the request headers for the current OpenAI API key"""
+    return _headers_for(_api_key())
+
+
+# tiktoken encodings loaded so far, by model. Failures are not cached: loading is
+# attempted again once ENCODING_RETRY_SECONDS have passed since the last failure.
+_encodings: Dict[str, "tiktoken.Encoding"] = {}
+_encoding_failures: Dict[str, float] = {}
+ENCODING_RETRY_SECONDS = 300
+
+
+def _get_encoding(model: str) -> Optional["tiktoken.Encoding"]:
+    """
+    Return the tiktoken encoding used by the given model, or None if it cannot be
+    loaded. The first load downloads the BPE ranks and blocks: call this off the
+    event loop (asyncio.to_thread), or warm it up with preload_encodings().
+    """
+    encoding = _encodings.get(model)
+    if encoding is not None:
+        return encoding
+    failed_at = _encoding_failures.get(model)
+    if failed_at is not None and time.monotonic() - failed_at < ENCODING_RETRY_SECONDS:
+        return None
+    try:
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model(model)
+    except Exception as e:
+        logger.warning("Could not load tiktoken encoding for %s: %s", model, e)
+        _encoding_failures[model] = time.monotonic()
+        return None
+    _encodings[model] = encoding
+    _encoding_failures.pop(model, None)
+    return encoding
+
+
+def preload_encodings() -> None:
+    """Load the tiktoken encodings of the summary and transcript models (blocking; app startup hook)"""
+    for model in {_SUMMARY_PAYLOAD_BASE["model"], _TRANSCRIPT_PAYLOAD_BASE["model"]}:
+        _get_encoding(model)
+
+
+def _cut_middle(text: str, head_tokens: int, tail_tokens: int, encoding) -> str:
+    """
+    Keep only the first head_tokens and last tail_tokens tokens of a text
+
+    Args:
+        text: Text to shorten
+        head_tokens: Number of leading tokens to keep
+        tail_tokens: Number of trailing tokens to keep
+        encoding: tiktoken encoding, or None to approximate with ~4 characters per token
+
+    Returns:
+        The text, truncated in the middle if longer than head_tokens + tail_tokens tokens
+    """
+    if encoding is None:
+        if len(text) <= (head_tokens + tail_tokens) * 4:
+            return text
+        tail = text[-tail_tokens * 4:] if tail_tokens > 0 else ""
+        return text[:head_tokens * 4] + "\n...[truncated]...\n" + tail
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= head_tokens + tail_tokens:
+        return text
+    tail = encoding.decode(tokens[-tail_tokens:]) if tail_tokens > 0 else ""
+    return encoding.decode(tokens[:head_tokens]) + "\n...[truncated]...\n" + tail
+
+
+def _truncate_cv_text(cv_text: str) -> str:
+    """
+    Bound the size of the CV sent to OpenAI by keeping only its head and tail
+    
+    Args:
+        cv_text: Extracted text from the candidate's CV
+        
+    Returns:
+        The CV text, truncated in the middle if longer than CV_HEAD_TOKENS + CV_TAIL_TOKENS tokens
+    """
+    encoding = _get_encoding(_SUMMARY_PAYLOAD_BASE["model"])
+    return _cut_middle(cv_text, CV_HEAD_TOKENS, CV_TAIL_TOKENS, encoding)
+
+
+def _truncate_transcript_turns(turns: List[str]) -> List[str]:
+    """
+    Bound the size of the transcript sent to OpenAI by dropping turns from the middle
+
+    Args:
+        turns: Formatted transcript turns, in order
+
+    Returns:
+        The turns, keeping as many opening and closing turns as fit in
+        TRANSCRIPT_MAX_TOKENS tokens
+    """
+    encoding = _get_encoding(_TRANSCRIPT_PAYLOAD_BASE["model"])
+    if encoding is None:
+        # Approximate with ~4 characters per token
+        sizes = [len(turn) // 4 + 1 for turn in turns]
+    else:
+        sizes = [len(tokens) for tokens in encoding.encode_batch(turns, disallowed_special=())]
+    if sum(sizes) <= TRANSCRIPT_MAX_TOKENS:
+        return turns
+
+    # Take turns alternately from both ends; when the next turn of one end does
+    # not fit, keep filling from the other end until neither end fits
+    head, tail = 0, len(turns)
+    budget = TRANSCRIPT_MAX_TOKENS
+    take_head = True
+    while head < tail:
+        index = head if take_head else tail - 1
+        if sizes[index] > budget:
+            take_head = not take_head
+            index = head if take_head else tail - 1
+            if sizes[index] > budget:
+                break
+        budget -= sizes[index]
+        if take_head:
+            head += 1
+        else:
+            tail -= 1
+        take_head = not take_head
+
+    # Spend what is left of the budget on the first dropped turn, cut in its
+    # middle, so that an oversized turn (e.g. a whole transcript sent as a
+    # single string) is shortened instead of dropped
+    kept = turns[:head]
+    if head < tail and budget > 0:
+        head_budget = budget * 3 // 4
+        kept.append(_cut_middle(turns[head], head_budget, budget - head_budget, encoding))
+        head += 1
+    if head < tail:
+        kept.append("- ...[turns omitted]...")
+    return kept + turns[tail:]
+
+
+def _count_pdf_pages(file_path: str) -> int:
+    """Return the number of pages of a PDF"""
+    import pypdfium2 as pdfium
+
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+
+@lru_cache(maxsize=None)
+def _docx_xpaths() -> Tuple[Callable, Callable]:
+    """Compile (once) the XPath expressions selecting DOCX paragraphs and their run content"""
+    from lxml import etree
+
+    run_content = "*[self::w:t or self::w:tab or self::w:ptab or self::w:br or self::w:cr or self::w:noBreakHyphen]"
+    return (
+        etree.XPath("//w:p[not(ancestor::mc:Fallback)]", namespaces=_DOCX_NS),
+        etree.XPath(f"./w:r/{run_content} | ./w:hyperlink/w:r/{run_content}", namespaces=_DOCX_NS)
+    )
+
+
+def _docx_run_text(element: Any) -> str:
+    """Return the text equivalent of a run content element, as python-docx renders it"""
+    tag = element.tag
+    if tag == _DOCX_W + "t":
+        return element.text or ""
+    if tag in (_DOCX_W + "tab", _DOCX_W + "ptab"):
+        return "\t"
+    if tag == _DOCX_W + "br":
+        # Only line breaks produce text; page and column breaks render as ""
+        return "\n" if element.get(_DOCX_W + "type", "textWrapping") == "textWrapping" else ""
+    if tag == _DOCX_W + "cr":
+        return "\n"
+    return "-"  # w:noBreakHyphen
+
+
+def _extract_docx_text(file_path: str) -> str:
+    """
+    Extract the text of a DOCX file, skipping empty paragraphs (they only add prompt tokens)
+
+    Args:
+        file_path: Path to the DOCX file
+
+    Returns:
+        The paragraphs of the document, one per line
+    """
+    from lxml import etree
+
+    find_paragraphs, paragraph_content = _docx_xpaths()
+    with zipfile.ZipFile(file_path) as archive:
+        root = etree.fromstring(archive.read("word/document.xml"))
+    paragraphs = (
+        ''.join(_docx_run_text(element) for element in paragraph_content(paragraph))
+        for paragraph in find_paragraphs(root)
+    )
+    return '\n'.join(text for text in paragraphs if text)
+
+
+async def extract_text_from_cv(file_path: str) -> str:
+    """
+    Extract text from a CV file (PDF or DOCX)
+    
+    Args:
+        file_path: Path to the CV file
+        
+    Returns:
+        Extracted text from the CV
+    """
+    try:
+        # Check file extension
+        file_extension = file_path.split('.')[-1].lower()
+        
+        if file_extension == 'pdf':
+            # Only pages missing from the page cache are parsed
+            digest, pages = await asyncio.to_thread(_read_pdf_page_cache, file_path)
+            missing = [i for i, text in enumerate(pages) if text is None]
+            if not missing:
+                return ''.join(pages)
+
+            # Extract text from PDF, spreading large documents across the worker processes
+            if len(missing) < PDF_PARALLEL_MIN_PAGES:
+                texts = await asyncio.to_thread(_extract_pdf_pages, file_path, missing)
+            else:
+                chunk_size = max(1, -(-len(missing) // PDF_WORKERS))
+                chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+
+                loop = asyncio.get_running_loop()
+                results = await asyncio.gather(*(
+                    loop.run_in_executor(_PROC_POOL, _extract_pdf_pages, file_path, chunk)
+                    for chunk in chunks
+                ))
+                texts = [text for result in results for text in result]
+
+            extracted = dict(zip(missing, texts))
+            await asyncio.to_thread(_write_pdf_page_cache, digest, len(pages), extracted)
+            for i, text in extracted.items():
+                pages[i] = text
+            return ''.join(pages)
+                
+        elif file_extension == 'docx':
+            # Parsing is blocking, keep it off the event loop
+            return await asyncio.to_thread(_extract_docx_text, file_path)
+            
+        else:
+            return f"Unsupported file format: {file_extension}"
+            
+    except Exception as e:
+        logger.error("Error extracting text from CV: %s", e)
+        return f"Error extracting text: {str(e)}"
+
+
+class OpenAILengthError(Exception):
+    """The completion was cut by its max_tokens budget (finish_reason "length")"""
+
+
+class OpenAIRetryableError(Exception):
+    """Transient OpenAI error (rate limit or server error) worth retrying"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[float] = None):
+        super().__init__(f"OpenAI API error: {status_code} - {detail}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _raise_for_openai_status(response: httpx.Response) -> None:
+    """
+    Raise if the OpenAI response is not successful: OpenAIRetryableError for
+    429/5xx (with the Retry-After delay when the server sent one), a plain
+    Exception for anything else.
+    """
+    if response.status_code == 200:
+        return
+    if response.status_code in RETRYABLE_STATUS_CODES:
+        retry_after = None
+        try:
+            # OpenAI sends a millisecond-precision retry-after-ms next to Retry-After
+            if "retry-after-ms" in response.headers:
+                retry_after = float(response.headers["retry-after-ms"]) / 1000
+            else:
+                retry_after = float(response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            pass
+        raise OpenAIRetryableError(response.status_code, response.text, retry_after)
+    raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+
+
+_backoff = wait_exponential_jitter(initial=1, max=30)
+# Spreads out callers throttled by the same 429 so they don't all retry at once
+_retry_after_jitter = wait_random(0, 2)
+
+
+def _wait_for_retry(retry_state) -> float:
+    """Honor OpenAI's Retry-After header (plus jitter), otherwise back off exponentially with jitter"""
+    error = retry_state.outcome.exception()
+    if isinstance(error, OpenAIRetryableError) and error.retry_after is not None:
+        return min(error.retry_after, 60.0) + _retry_after_jitter(retry_state)
+    return _backoff(retry_state)
+
+
+# Retry policy for OpenAI calls: network errors and 429/5xx responses, up to 5 attempts
+_openai_retry = retry(
+    retry=retry_if_exception_type((httpx.TransportError, OpenAIRetryableError)),
+    wait=_wait_for_retry,
+    stop=stop_after_attempt(OPENAI_MAX_ATTEMPTS),
+    reraise=True
+)
+
+
+async def _iter_chat_completion(
+    client: httpx.AsyncClient,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    timeout: float
+) -> AsyncIterator[str]:
+    """
+    Send a chat completion request with server-side streaming enabled and
+    yield the content deltas as they arrive.
+
+    Args:
+        client: HTTP client used for the request
+        headers: Request headers (including the Authorization header)
+        payload: Chat completion payload (``stream`` is forced to True)
+        timeout: Request timeout in seconds
+
+    Yields:
+        Non-empty content deltas, in order
+
+    Raises:
+        OpenAILengthError: If the completion was cut by the payload's max_tokens
+    """
+    async with _get_semaphore(), client.stream(
+        "POST",
+        OPENAI_API_URL,
+        headers=headers,
+        content=orjson.dumps({**payload, "stream": True}),
+        timeout=timeout
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            _raise_for_openai_status(response)
+
+        # Server-Sent Events: one "data: {json}" line per chunk, terminated by "data: [DONE]"
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = line[6:]
+            if data == "[DONE]":
+                break
+            choices = orjson.loads(data).get("choices")
+            if choices:
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+                if choices[0].get("finish_reason") == "length":
+                    raise OpenAILengthError(f"Completion truncated at max_tokens={payload.get('max_tokens')}")
+
+
+@_openai_retry
+async def _stream_chat_completion(
+    client: httpx.AsyncClient,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    timeout: float
+) -> str:
+    """
+    Stream a chat completion and accumulate the content deltas.
+
+    Args:
+        client: HTTP client used for the request
+        headers: Request headers (including the Authorization header)
+        payload: Chat completion payload (``stream`` is forced to True)
+        timeout: Request timeout in seconds
+
+    Returns:
+        The full completion content
+    """
+    content = io.StringIO()
+    async for delta in _iter_chat_completion(client, headers, payload, timeout):
+        content.write(delta)
+    return content.getvalue()
+
+
+@_openai_retry
+async def _create_embedding(
+    client: httpx.AsyncClient,
+    headers: Dict[str, str],
+    text: str,
+    timeout: float
+) -> List[float]:
+    """
+    Compute the embedding of a text with OPENAI_EMBEDDING_MODEL.
+
+    Args:
+        client: HTTP client used for the request
+        headers: Request headers (including the Authorization header)
+        text: Text to embed
+        timeout: Request timeout in seconds
+
+    Returns:
+        The embedding vector
+    """
+    async with _get_semaphore():
+        response = await client.post(
+            OPENAI_EMBEDDING_URL,
+            headers=headers,
+            content=orjson.dumps({"model": OPENAI_EMBEDDING_MODEL, "input": text}),
+            timeout=timeout
+        )
+    _raise_for_openai_status(response)
+    return orjson.loads(response.content)["data"][0]["embedding"]
+
+
+async def generate_candidate_summary(cv_text: str) -> str:
+    """
+    Generate a structured analysis report of the candidate from their CV text using OpenAI GPT-4o mini
+   
+    Args:
+        cv_text: Extracted text from the candidate's CV
+       
+    Returns:
+        A structured analysis report following the specified format
+    """
+    if not _api_key():
+        raise ValueError("OpenAI API key is not configured")
+
+    # Identical CVs (retries, re-uploads) reuse the previous analysis
+    cache_key = _cache_key("summary", cv_text, _SUMMARY_PAYLOAD_BASE["model"])
+    cached = await _cache_get(_summary_cache, cache_key, SUMMARY_CACHE_SIZE)
+    if cached is not None:
+        return cached
+   
+    # Tokenizing (and loading the encoding the first time) blocks: keep it off the event loop
+    cv_text = await asyncio.to_thread(_truncate_cv_text, cv_text)
+   
+    # Prepare the request to OpenAI
+    payload = {
+        **_SUMMARY_PAYLOAD_BASE,
+        "messages": _SUMMARY_PAYLOAD_BASE["messages"] + [
+            {"role": "user", "content": SUMMARY_USER_PROMPT.format(cv_text=cv_text)}
+        ]
+    }
+   
+    try:
+        content = await _stream_chat_completion(_get_client(), _openai_headers(), payload, timeout=30.0)
+        content = content.strip()
+        await _cache_set(_summary_cache, cache_key, content, SUMMARY_CACHE_SIZE)
+           
+        return content
+               
+    except Exception as e:
+        logger.error("Error generating candidate analysis with OpenAI: %s", e)
+        # Return a default response in case of error
+        return "Unable to generate candidate analysis due to processing error."
+
+
+async def batch(fn: Callable[[T], Awaitable[R]], args_list: List[T]) -> List[Union[R, BaseException]]:
+    """
+    Run an OpenAI helper over many inputs concurrently. The number of requests
+    actually in flight is bounded by OPENAI_MAX_CONCURRENCY.
+    
+    Args:
+        fn: Coroutine function called once per item
+        args_list: Inputs passed to fn
+        
+    Returns:
+        The results in input order; an item that raised yields its exception
+    """
+    return await asyncio.gather(*(fn(args) for args in args_list), return_exceptions=True)
+
+
+async def generate_candidate_summaries(cv_texts: List[str]) -> List[Union[str, BaseException]]:
+    """
+    Generate candidate analysis reports for several CVs concurrently
+    
+    Args:
+        cv_texts: Extracted texts of the candidates' CVs
+        
+    Returns:
+        The analysis reports, in the same order as cv_texts
+    """
+    return await batch(generate_candidate_summary, cv_texts)
+
+
+async def generate_report_from_summary(summary: str) -> Dict[str, Any]:
+    """
+    Generate a detailed report from an interview summary using OpenAI.
+    
+    Args:
+        summary: The summary of the interview conversation
+        
+    Returns:
+        A dictionary containing the generated report fields:
+        - strengths: List of candidate strengths
+        - weaknesses: List of areas for improvement
+        - recommendation: Overall recommendation
+        - score: Numerical score (0-100)
+    """
+    if not _api_key():
+        raise ValueError("OpenAI API key is not configured")
+
+    # Re-analyzing an unchanged summary reuses the previous report
+    cache_key = _cache_key("report", summary, _REPORT_PAYLOAD_BASE["model"])
+    cached = await _cache_get(_report_cache, cache_key, REPORT_CACHE_SIZE)
+    if cached is not None:
+        return dict(cached)
+    
+    # Prepare the request to OpenAI
+    payload = {
+        **_REPORT_PAYLOAD_BASE,
+        "messages": _REPORT_PAYLOAD_BASE["messages"] + [
+            {"role": "user", "content": REPORT_USER_PROMPT.format(summary=summary)}
+        ]
+    }
+    
+    try:
+        # The JSON report is only parsed once the stream is complete
+        content = await _stream_chat_completion(_get_client(), _openai_headers(), payload, timeout=30.0)
+        
+        logger.debug("OpenAI raw response content: %s", content)
+        
+        # Structured outputs guarantee a JSON object matching REPORT_RESPONSE_FORMAT
+        report_data = orjson.loads(content)
+        
+        # Ensure score is within range (0-5 scale now)
+        report_data["score"] = max(0, min(5, report_data["score"]))
+        
+        # Convert to the expected format for database storage
+        # We'll store the full report content as a single field
+        formatted_report = {
+            "report_content": report_data["report_content"],
+            "recommendation": report_data["recommendation"],
+            "score": int(report_data["score"] * 20),  # Convert 5-scale to 100-scale for compatibility
+            "strengths": ["Voir rapport complet"],  # Placeholder for backward compatibility
+            "weaknesses": ["Voir rapport complet"]   # Placeholder for backward compatibility
+        }
+        await _cache_set(_report_cache, cache_key, formatted_report, REPORT_CACHE_SIZE)
+        
+        return dict(formatted_report)
+    
+    except Exception as e:
+        logger.error("Error generating report with OpenAI: %s", e)
+        # Return a default response in case of error
+        return {
+            "report_content": "# Rapport d'évaluation\n\n**Erreur de traitement**\n\nImpossible de générer le rapport automatiquement. Une analyse manuelle est requise.",
+            "recommendation": "Erreur de traitement - analyse manuelle requise",
+            "score": 50,
+            "strengths": ["Voir rapport complet"],
+            "weaknesses": ["Voir rapport complet"]
+        }
+
+
+def _transcript_cache_key(transcript: List[Dict[str, Any]], job_title: Optional[str]) -> str:
+    """
+    Build the report cache key for a transcript (canonicalized JSON) and job title
+    """
+    return _cache_key(
+        "transcript",
+        orjson.dumps([transcript or [], job_title], option=orjson.OPT_SORT_KEYS, default=str).decode(),
+        _TRANSCRIPT_PAYLOAD_BASE["model"]
+    )
+
+
+def _role_label(turn: Dict[str, Any]) -> str:
+    """
+    Normalize a transcript turn's role to its French label
+    """
+    role = str(turn.get("role", turn.get("speaker", ""))).strip()
+    return _ROLE_MAP.get(role.lower(), role.capitalize())
+
+
+def _transcript_max_tokens(transcript_block: str) -> int:
+    """
+    Size the report's output budget to the interview: short screenings yield short
+    reports, and generation time grows with the number of tokens produced
+    """
+    encoding = _get_encoding(_TRANSCRIPT_PAYLOAD_BASE["model"])
+    if encoding is None:
+        # Approximate with ~4 characters per token
+        transcript_tokens = len(transcript_block) // 4
+    else:
+        transcript_tokens = len(encoding.encode(transcript_block, disallowed_special=()))
+    return min(
+        TRANSCRIPT_REPORT_MAX_TOKENS,
+        TRANSCRIPT_REPORT_MIN_TOKENS + transcript_tokens // TRANSCRIPT_REPORT_TOKENS_RATIO
+    )
+
+
+def _build_transcript_payload(
+    transcript: List[Dict[str, Any]],
+    job_title: Optional[str]
+) -> Tuple[Dict[str, Any], str, List[str]]:
+    """
+    Build the chat completion payload for a transcript-based report
+
+    Args:
+        transcript: List of turns with fields including 'role' and 'message'.
+        job_title: Optional job title context to include in the prompt.
+
+    Returns:
+        (payload, transcript_block, turns)
+    """
+    # Build a readable transcript text, skipping turns without a message
+    turns = [
+        f"- {_role_label(turn)}: {msg}"
+        for turn in transcript or []
+        if (msg := str(next((turn[key] for key in _MSG_KEYS if turn.get(key) is not None), None) or "").strip())
+    ]
+    kept_turns = _truncate_transcript_turns(turns)
+    transcript_block = "\n".join(kept_turns)
+
+    job_title_line = f"Poste visé: {job_title}\n" if job_title else ""
+
+    # Static instructions first, everything that varies per interview strictly at the tail
+    prompt = TRANSCRIPT_PROMPT.format(job_title_line=job_title_line, transcript_block=transcript_block)
+
+    payload = {
+        **_TRANSCRIPT_PAYLOAD_BASE,
+        "max_tokens": _transcript_max_tokens(transcript_block),
+        "messages": _TRANSCRIPT_PAYLOAD_BASE["messages"] + [
+            {"role": "user", "content": prompt}
+        ]
+    }
+
+    return payload, transcript_block, turns
+
+
+def _parse_transcript_report(content: str) -> Dict[str, Any]:
+    """
+    Parse a structured-output completion matching TRANSCRIPT_RESPONSE_FORMAT
+    """
+    # Debug log (truncated)
+    logger.debug("OpenAI raw content (first 200): %.200s", content)
+    data = orjson.loads(content)
+    return {"report_content": data["report_content"].strip()}
+
+
+async def _semantic_lookup(
+    transcript_block: str,
+    job_title: Optional[str]
+) -> Tuple[Optional[List[float]], Optional[Dict[str, Any]]]:
+    """
+    Embed a transcript and look up a similar cached report when the semantic cache is enabled
+
+    Returns:
+        (embedding, report), either of which may be None
+    """
+    if SEMANTIC_CACHE_THRESHOLD <= 0:
+        return None, None
+    try:
+        embedding = await _create_embedding(_get_client(), _openai_headers(), transcript_block, timeout=15.0)
+    except Exception as e:
+        logger.warning("Transcript embedding failed, skipping semantic cache: %s", e)
+        return None, None
+    return embedding, await asyncio.to_thread(_semantic_cache_get, job_title, embedding)
+
+
+async def generate_report_from_transcript(transcript: List[Dict[str, Any]], job_title: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Generate a detailed report using the full interview transcript (role + message) rather than a summary.
+
+    Args:
+        transcript: List of turns with fields including 'role' and 'message'.
+        job_title: Optional job title context to include in the prompt.
+
+    Returns:
+        A dict with only: report_content
+    """
+    if not _api_key():
+        raise ValueError("OpenAI API key is not configured")
+
+    # The same transcript (canonicalized JSON) and job title reuse the previous report
+    cache_key = _transcript_cache_key(transcript, job_title)
+    cached = await _cache_get(_transcript_report_cache, cache_key, TRANSCRIPT_REPORT_CACHE_SIZE)
+    if cached is not None:
+        return dict(cached)
+
+    # Tokenizing the transcript blocks: keep it off the event loop
+    payload, transcript_block, turns = await asyncio.to_thread(_build_transcript_payload, transcript, job_title)
+
+    embedding, similar = await _semantic_lookup(transcript_block, job_title)
+    if similar is not None:
+        return dict(similar)
+
+    try:
+        try:
+            content = await _stream_chat_completion(_get_client(), _openai_headers(), payload, timeout=45.0)
+        except OpenAILengthError as e:
+            if payload["max_tokens"] >= TRANSCRIPT_REPORT_MAX_TOKENS:
+                raise
+            # The JSON report was cut mid-way: ask once more with the full budget
+            logger.warning("%s, retrying with max_tokens=%s", e, TRANSCRIPT_REPORT_MAX_TOKENS)
+            payload = {**payload, "max_tokens": TRANSCRIPT_REPORT_MAX_TOKENS}
+            content = await _stream_chat_completion(_get_client(), _openai_headers(), payload, timeout=45.0)
+        # Structured outputs guarantee a JSON object matching TRANSCRIPT_RESPONSE_FORMAT
+        report = _parse_transcript_report(content)
+        await _cache_set(_transcript_report_cache, cache_key, report, TRANSCRIPT_REPORT_CACHE_SIZE)
+        if embedding is not None:
+            await asyncio.to_thread(_semantic_cache_set, job_title, embedding, report)
+        return dict(report)
+    except Exception as e:
+        logger.error("Error generating transcript-based report with OpenAI: %s", e)
+        # Helpful debug of provided context sizes
+        try:
+            logger.error("Transcript length (chars): %s; turns: %s", len(transcript_block), len(turns))
+        except Exception:
+            pass
+        return {
+            "report_content": (
+                "# Rapport d’évaluation\n\n"
+                "- Candidat : Non mentionné\n"
+                "- Poste visé : Non mentionné\n"
+                "- Date de l’entretien : \n"
+                "- Expérience totale : Non mentionnée\n"
+                "- Niveau de langue : Intermediate\n"
+                "- Score global : 0.0/5\n"
+                "- Statut du rapport : Présélection réalisée\n\n"
+                "## Présélection\n\n"
+                "### Vérifications effectuées\n"
+                "- Non mentionnées\n\n"
+                "### Disponibilité\n"
+                "- Non mentionnée\n\n"
+                "### Prétention salariale\n"
+                "- Non mentionnée\n\n"
+                "### Autres réponses aux questions du recruteur\n"
+                "- Non mentionnées\n\n"
+                "## Évaluation\n\n"
+                "### Points forts\n"
+                "- Non mentionnés\n\n"
+                "### Points faibles\n"
+                "- Non mentionnés\n\n"
+                "## Recommandation\n"
+                "- Non mentionnée\n"
+            )
+        }
+
+
+async def stream_report_from_transcript(
+    transcript: List[Dict[str, Any]],
+    job_title: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a transcript-based report as it is generated, e.g. for a FastAPI
+    StreamingResponse. The chunks concatenate to the same JSON document
+    ({"report_content": ...}) that generate_report_from_transcript parses;
+    the completed report is cached once the stream finishes.
+
+    Args:
+        transcript: List of turns with fields including 'role' and 'message'.
+        job_title: Optional job title context to include in the prompt.
+
+    Yields:
+        JSON text fragments of the report
+    """
+    if not _api_key():
+        raise ValueError("OpenAI API key is not configured")
+
+    cache_key = _transcript_cache_key(transcript, job_title)
+    cached = await _cache_get(_transcript_report_cache, cache_key, TRANSCRIPT_REPORT_CACHE_SIZE)
+    if cached is not None:
+        yield orjson.dumps(cached).decode()
+        return
+
+    payload, transcript_block, _ = await asyncio.to_thread(_build_transcript_payload, transcript, job_title)
+    # finish_reason "length" only arrives after the chunks have been sent, too late to
+    # retry with a larger budget as generate_report_from_transcript does: use the full one
+    payload["max_tokens"] = TRANSCRIPT_REPORT_MAX_TOKENS
+    embedding, similar = await _semantic_lookup(transcript_block, job_title)
+    if similar is not None:
+        yield orjson.dumps(similar).decode()
+        return
+
+    content = io.StringIO()
+    # Chunks already sent to the caller cannot be replayed, so there is no retry here
+    async for delta in _iter_chat_completion(_get_client(), _openai_headers(), payload, timeout=45.0):
+        content.write(delta)
+        yield delta
+
+    report = _parse_transcript_report(content.getvalue())
+    await _cache_set(_transcript_report_cache, cache_key, report, TRANSCRIPT_REPORT_CACHE_SIZE)
+    if embedding is not None:
+        await asyncio.to_thread(_semantic_cache_set, job_title, embedding, report)
+
+
+async def generate_reports_from_transcripts(
+    items: List[Tuple[List[Dict[str, Any]], Optional[str]]]
+) -> List[Union[Dict[str, Any], BaseException]]:
+    """
+    Generate transcript-based reports for several interviews concurrently
+
+    Args:
+        items: (transcript, job_title) pairs
+
+    Returns:
+        The reports, in the same order as items
+    """
+    return await batch(lambda item: generate_report_from_transcript(*item), items)
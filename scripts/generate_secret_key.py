@@ -1,40 +1,65 @@
 import secrets
 import os
+import re
+import shutil
 from pathlib import Path
 
-def generate_secret_key(length=64):
-    """Generate a secure random string suitable for SECRET_KEY."""
+# First SECRET_KEY assignment in the .env file (the line ending is left untouched)
+SECRET_KEY_LINE = re.compile(rb'^SECRET_KEY=[^\r\n]*', re.M)
+
+def generate_secret_key(length=32):
+    """Generate a secure random string suitable for SECRET_KEY (length bytes of entropy, hex-encoded)."""
     return secrets.token_hex(length)
 
+def _write_and_sync(fd, content):
+    """Write all of content to fd and flush it to disk, so the secret survives a crash."""
+    view = memoryview(content)
+    while view:
+        view = view[os.write(fd, view):]
+    os.fsync(fd)
+
+def _create_new(env_path, line):
+    """Create .env readable by its owner only (it holds secrets)."""
+    fd = os.open(env_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        _write_and_sync(fd, line + b'\n')
+    finally:
+        os.close(fd)
+
+def _append(env_path, line):
+    """Add SECRET_KEY at the end of an existing .env."""
+    with open(env_path, 'ab') as file:
+        file.write(b'\n' + line + b'\n')
+        file.flush()
+        os.fsync(file.fileno())
+
+def _rewrite(env_path, content):
+    """Atomically replace .env: write a temporary file next to it and swap it in."""
+    tmp_path = env_path.with_name(env_path.name + '.tmp')
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        _write_and_sync(fd, content)
+    finally:
+        os.close(fd)
+    shutil.copymode(env_path, tmp_path)
+    os.replace(tmp_path, env_path)
+
 def update_env_file(secret_key):
     """Update or create .env file with the SECRET_KEY."""
     env_path = Path(__file__).parent.parent / '.env'
+    line = b'SECRET_KEY=' + secret_key.encode()
     
-    # Check if .env file exists
-    if env_path.exists():
-        # Read existing content
-        with open(env_path, 'r') as file:
-            lines = file.readlines()
-        
-        # Check if SECRET_KEY already exists
-        secret_key_exists = False
-        for i, line in enumerate(lines):
-            if line.startswith('SECRET_KEY='):
-                lines[i] = f'SECRET_KEY={secret_key}\n'
-                secret_key_exists = True
-                break
-        
-        # Add SECRET_KEY if it doesn't exist
-        if not secret_key_exists:
-            lines.append(f'\nSECRET_KEY={secret_key}\n')
-        
-        # Write back to file
-        with open(env_path, 'w') as file:
-            file.writelines(lines)
+    try:
+        data = env_path.read_bytes()
+    except FileNotFoundError:
+        _create_new(env_path, line)
     else:
-        # Create new .env file
-        with open(env_path, 'w') as file:
-            file.write(f'SECRET_KEY={secret_key}\n')
+        # Replace the existing SECRET_KEY in one pass, or append it
+        content, replaced = SECRET_KEY_LINE.subn(lambda _: line, data, count=1)
+        if replaced:
+            _rewrite(env_path, content)
+        else:
+            _append(env_path, line)
     
     print(f"SECRET_KEY has been added to {env_path}")
 
@@ -1,13 +1,134 @@
 import os
+import io
+import asyncio
+import csv
 import argparse
-from dotenv import load_dotenv
-load_dotenv()
+from app.core.env_cache import load_env_cached
+load_env_cached()
 
-from sqlalchemy import create_engine, Table, Column, Integer, String, Text, Date, MetaData, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Date, String, Text, cast, column, exists, select, text, values
+from app.db.engine_cache import get_engine
+from app.models.job import Job
+from app.models.job_requirement import JobRequirement
 from datetime import date
+from functools import lru_cache
+from pathlib import Path
 
-def seed_jobs(force=False):
+# Sample jobs; a "__today__" posted_date is replaced with the seeding date
+JOBS_SEED_FILE = Path(__file__).parent / "scripts" / "jobs_seed.json"
+
+def copy_requirements(connection, job_requirements, requirement_rows):
+    """
+    Load requirement rows with PostgreSQL COPY, within the connection's transaction.
+    Falls back to an executemany INSERT when the driver has no COPY support.
+    """
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if not hasattr(cursor, "copy_expert"):
+            connection.execute(job_requirements.insert(), requirement_rows)
+            return
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerows((row["requirement"], row["job_id"]) for row in requirement_rows)
+        buffer.seek(0)
+        cursor.copy_expert("COPY job_requirements (requirement, job_id) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+@lru_cache(maxsize=4)
+def _read_jobs_seed(path, mtime_ns):
+    """Parse the seed file (cached until the file changes)"""
+    import orjson
+    
+    return orjson.loads(Path(path).read_bytes())
+
+def load_jobs_data():
+    """Return the sample jobs to seed, with their posted_date resolved"""
+    jobs_seed = _read_jobs_seed(str(JOBS_SEED_FILE), JOBS_SEED_FILE.stat().st_mtime_ns)
+    today = date.today()
+    return [
+        {
+            **job_data,
+            "posted_date": today if job_data["posted_date"] == "__today__" else date.fromisoformat(job_data["posted_date"])
+        }
+        for job_data in jobs_seed
+    ]
+
+def insert_new_jobs(jobs, job_rows):
+    """
+    Build an INSERT ... SELECT of job_rows that skips every job whose (title, company)
+    is already in the table, returning the id, title and company of the inserted jobs
+    """
+    new_jobs = values(
+        column("title", String),
+        column("company", String),
+        column("location", String),
+        column("description", Text),
+        column("posted_date", Date),
+        name="new_jobs"
+    ).data([
+        (row["title"], row["company"], row["location"], row["description"], row["posted_date"])
+        for row in job_rows
+    ])
+    already_seeded = exists().where(jobs.c.title == new_jobs.c.title, jobs.c.company == new_jobs.c.company)
+    return (
+        jobs.insert()
+        .from_select(
+            ["title", "company", "location", "description", "posted_date"],
+            select(
+                cast(new_jobs.c.title, String),
+                cast(new_jobs.c.company, String),
+                cast(new_jobs.c.location, String),
+                cast(new_jobs.c.description, Text),
+                cast(new_jobs.c.posted_date, Date)
+            ).where(~already_seeded)
+        )
+        .returning(jobs.c.id, jobs.c.title, jobs.c.company)
+    )
+
+async def seed_jobs_parallel(database_url, jobs_data):
+    """
+    Insert jobs concurrently with asyncpg, each job and its requirements in its own
+    transaction, so the per-statement round-trips of different jobs overlap.
+    Jobs whose (title, company) already exists are skipped.
+    
+    Returns:
+        The number of jobs inserted
+    """
+    import asyncpg  # Optional dependency, only needed for --parallel
+    
+    pool = await asyncpg.create_pool(database_url, min_size=1, max_size=min(10, len(jobs_data)))
+    
+    async def insert_job(job_data):
+        async with pool.acquire() as connection:
+            async with connection.transaction():
+                job_id = await connection.fetchval(
+                    "INSERT INTO jobs (title, company, location, description, posted_date) "
+                    "SELECT $1::varchar, $2::varchar, $3::varchar, $4::text, $5::date "
+                    "WHERE NOT EXISTS (SELECT 1 FROM jobs WHERE title = $1 AND company = $2) "
+                    "RETURNING id",
+                    job_data["title"],
+                    job_data["company"],
+                    job_data["location"],
+                    job_data["description"],
+                    job_data["posted_date"]
+                )
+                if job_id is None:
+                    return False
+                await connection.executemany(
+                    "INSERT INTO job_requirements (requirement, job_id) VALUES ($1, $2)",
+                    [(req_text, job_id) for req_text in job_data["requirements"]]
+                )
+                return True
+    
+    try:
+        inserted = await asyncio.gather(*(insert_job(job_data) for job_data in jobs_data))
+    finally:
+        await pool.close()
+    return sum(inserted)
+
+def seed_jobs(parallel=False):
     # Get database connection parameters from environment variables
     user = os.getenv("POSTGRES_USER")
     password = os.getenv("POSTGRES_PASSWORD")
@@ -20,138 +141,58 @@ def seed_jobs(force=False):
     print(f"Connecting to: {database_url}")
     
     # Create a new session
-    engine = create_engine(database_url)
+    engine = get_engine(database_url)
     
-    # Create metadata object
-    metadata = MetaData()
-    
-    # Define tables directly using SQLAlchemy Core to avoid model dependencies
-    jobs = Table(
-        'jobs', 
-        metadata,
-        Column('id', Integer, primary_key=True),
-        Column('title', String),
-        Column('company', String),
-        Column('location', String),
-        Column('description', Text),
-        Column('posted_date', Date)
-    )
-    
-    job_requirements = Table(
-        'job_requirements',
-        metadata,
-        Column('id', Integer, primary_key=True),
-        Column('requirement', String, nullable=False),
-        Column('job_id', Integer)
-    )
-    
-    # Sample job data
-    jobs_data = [
-        {
-            "title": "Full Stack Developer",
-            "company": "BM Tech",
-            "location": "Remote",
-            "description": "We are looking for a Full Stack Developer to join our team. The ideal candidate should have experience with both frontend and backend technologies.",
-            "posted_date": date.today(),
-            "requirements": [
-                "3+ years of experience with JavaScript/TypeScript",
-                "Experience with React or Angular",
-                "Experience with Node.js or Python",
-                "Knowledge of SQL and NoSQL databases",
-                "Good communication skills"
-            ]
-        },
-        {
-            "title": "Data Scientist",
-            "company": "BM Tech",
-            "location": "Algeirs, Algeria",
-            "description": "Join our data science team to work on cutting-edge machine learning projects and help drive business decisions through data analysis.",
-            "posted_date": date.today(),
-            "requirements": [
-                "MS or PhD in Computer Science, Statistics, or related field",
-                "Experience with Python, R, or Julia",
-                "Knowledge of machine learning frameworks like TensorFlow or PyTorch",
-                "Experience with data visualization tools",
-                "Strong analytical and problem-solving skills"
-            ]
-        },
-        {
-            "title": "DevOps Engineer",
-            "company": "BM Tech",
-            "location": "Algeirs, Algeria",
-            "description": "Looking for a DevOps Engineer to help us build and maintain our cloud infrastructure and CI/CD pipelines.",
-            "posted_date": date.today(),
-            "requirements": [
-                "Experience with AWS, Azure, or GCP",
-                "Knowledge of Docker and Kubernetes",
-                "Experience with CI/CD tools like Jenkins or GitHub Actions",
-                "Scripting skills in Python, Bash, or PowerShell",
-                "Understanding of infrastructure as code principles"
-            ]
-        },
-        {
-            "title": "UX/UI Designer",
-            "company": "BM Tech",
-            "location": "Remote",
-            "description": "We're seeking a talented UX/UI Designer to create beautiful and intuitive user interfaces for our web and mobile applications.",
-            "posted_date": date.today(),
-            "requirements": [
-                "Portfolio demonstrating UI/UX projects",
-                "Proficiency in design tools like Figma, Sketch, or Adobe XD",
-                "Understanding of user-centered design principles",
-                "Experience with responsive design",
-                "Ability to collaborate with developers and stakeholders"
-            ]
-        },
-        {
-            "title": "Backend Engineer",
-            "company": "BM Tech",
-            "location": "Algeirs, Algeria",
-            "description": "Join our backend team to build scalable and secure APIs for our financial services platform.",
-            "posted_date": date.today(),
-            "requirements": [
-                "Strong experience with Java, Python, or Go",
-                "Knowledge of RESTful API design",
-                "Experience with relational databases",
-                "Understanding of microservices architecture",
-                "Knowledge of security best practices"
-            ]
-        }
-    ]
+    # Use the real schema from the ORM models
+    jobs = Job.__table__
+    job_requirements = JobRequirement.__table__
     
     try:
-        # Check if jobs already exist
-        with engine.connect() as connection:
-            result = connection.execute(text("SELECT COUNT(*) FROM jobs"))
-            existing_jobs_count = result.scalar()
+        # Seeding is idempotent: jobs whose (title, company) already exists are skipped
+        jobs_data = load_jobs_data()
         
-        if existing_jobs_count > 0 and not force:
-            print(f"There are already {existing_jobs_count} jobs in the database. Use --force to add more jobs.")
-            return
+        if parallel:
+            try:
+                inserted_count = asyncio.run(seed_jobs_parallel(database_url, jobs_data))
+                print(f"Successfully seeded {inserted_count} jobs with their requirements "
+                      f"({len(jobs_data) - inserted_count} already existed).")
+                return
+            except ImportError:
+                print("asyncpg is not installed, seeding in a single transaction instead.")
         
-        # Add jobs and their requirements
+        # Add jobs and their requirements in two bulk statements. There is no pre-check
+        # query: the INSERT ... SELECT ... WHERE NOT EXISTS below is the first statement
+        # on the pooled connection, so connecting is paid once and no warm-up query is needed.
         with engine.begin() as connection:  # This automatically handles transactions
-            for job_data in jobs_data:
-                requirements = job_data.pop("requirements")
-                
-                # Insert job
-                result = connection.execute(jobs.insert().values(**job_data))
-                job_id = result.inserted_primary_key[0]
-                
-                # Insert requirements for the job
-                for req_text in requirements:
-                    connection.execute(job_requirements.insert().values(
-                        requirement=req_text,
-                        job_id=job_id
-                    ))
+            # One-shot seed: skip the WAL flush wait on commit and check FKs once at commit time
+            connection.execute(text("SET LOCAL synchronous_commit = OFF"))
+            connection.execute(text("SET CONSTRAINTS ALL DEFERRED"))
+            
+            job_rows = [{k: v for k, v in job_data.items() if k != "requirements"} for job_data in jobs_data]
+            
+            # Insert all new jobs in one statement
+            result = connection.execute(insert_new_jobs(jobs, job_rows))
+            new_job_ids = {(row.title, row.company): row.id for row in result}
+            
+            # Load the requirements of the newly inserted jobs only
+            requirement_rows = [
+                {"requirement": req_text, "job_id": new_job_ids[(job_data["title"], job_data["company"])]}
+                for job_data in jobs_data
+                if (job_data["title"], job_data["company"]) in new_job_ids
+                for req_text in job_data["requirements"]
+            ]
+            if requirement_rows:
+                copy_requirements(connection, job_requirements, requirement_rows)
             
-            print(f"Successfully seeded {len(jobs_data)} jobs with their requirements.")
+            print(f"Successfully seeded {len(new_job_ids)} jobs with their requirements "
+                  f"({len(jobs_data) - len(new_job_ids)} already existed).")
     except Exception as e:
         print(f"Error seeding jobs: {e}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Seed jobs into the database')
-    parser.add_argument('--force', action='store_true', help='Force adding jobs even if some already exist')
+    parser.add_argument('--force', action='store_true', help='Deprecated, has no effect: jobs that already exist are always skipped')
+    parser.add_argument('--parallel', action='store_true', help='Insert jobs concurrently with asyncpg (one transaction per job)')
     args = parser.parse_args()
     
-    seed_jobs(force=args.force)
+    seed_jobs(parallel=args.parallel)